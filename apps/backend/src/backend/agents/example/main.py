@@ -1,25 +1,65 @@
 from langchain.tools import tool
-from langchain_core.messages.utils import trim_messages
+from langchain_core.messages import AnyMessage, HumanMessage
 from langgraph.prebuilt import create_react_agent
+from langgraph.prebuilt.chat_agent_executor import AgentState
 from shared.core import get_model, settings
 
+# Target window size. The window only moves when the history has grown past
+# 2 * _WINDOW_SIZE, so consecutive requests share an identical message prefix
+# and provider-side prompt caching keeps hitting in between jumps.
+_WINDOW_SIZE = 10
 
-def manage_agent_message_history(state: dict) -> dict:
-    messages = trim_messages(
-        state["messages"],
-        strategy="last",
-        token_counter=len,
-        max_tokens=10,
-        start_on="human",
-        end_on=("human", "tool"),
-    )
-    return {"llm_input_messages": messages}
 
+class ExampleAgentState(AgentState):
+    window_start_index: int
+    dynamic_context: str
 
-@tool
-def get_joke() -> str:
-    """Uma tool que retorna uma piada engraçada."""
-    return """
+
+def _append_dynamic_context(messages: list[AnyMessage], context: str | None) -> list[AnyMessage]:
+    """
+    Insert dynamic context right before the final user turn.
+
+    Prompt-caching invariant: static at the beginning, dynamic at the end.
+    Per-thread content (retrieved memory, user profile, ...) must never be
+    interpolated into the `prompt=` string below — that would sit in the
+    cached prefix region and bust the provider cache on every change.
+    """
+    if not context:
+        return messages
+    context_message = HumanMessage(content=f"[context]\n{context}")
+    # The hook runs before every model call in the ReAct loop, so the window
+    # may end in [AIMessage(tool_calls), ToolMessage]; splitting a tool call
+    # from its result is an invalid sequence. Only slot the context in front
+    # of a final human turn, otherwise append it at the end.
+    if messages and isinstance(messages[-1], HumanMessage):
+        return [*messages[:-1], context_message, messages[-1]]
+    return [*messages, context_message]
+
+
+def manage_agent_message_history(state: ExampleAgentState) -> dict:
+    """
+    Expanding window with deferred truncation over the message history.
+
+    Instead of trimming to the last N messages (which shifts the prefix on
+    every turn and invalidates LLM prompt caching), keep `messages[start:]`
+    and only advance `start` once the window exceeds 2 * N, jumping forward
+    by N. The pointer lives in the graph state so the checkpointer persists
+    it across resumed threads.
+    """
+    messages = state["messages"]
+    start = state.get("window_start_index", 0)
+    if len(messages) - start > 2 * _WINDOW_SIZE:
+        start = len(messages) - _WINDOW_SIZE
+    # The window must begin on a human turn; scan forward if it doesn't.
+    while start < len(messages) and messages[start].type != "human":
+        start += 1
+    return {
+        "llm_input_messages": _append_dynamic_context(messages[start:], state.get("dynamic_context")),
+        "window_start_index": start,
+    }
+
+
+_JOKE = """
 A professora pergunta para a turma:
 - Se algum de vocês acha que é burro, fique de pé.
 Todos ficam parados por alguns segundos, até que Joãozinho se levanta.
@@ -28,12 +68,21 @@ Todos ficam parados por alguns segundos, até que Joãozinho se levanta.
 """.strip()
 
 
+@tool
+def get_joke() -> str:
+    """Uma tool que retorna uma piada engraçada."""
+    return _JOKE
+
+
 model = get_model(settings.DEFAULT_MODEL)
 
 agent = create_react_agent(
     name="example-react-agent",
     model=model,
     tools=[get_joke],
+    # Keep this prompt static: dynamic per-thread content goes through
+    # `dynamic_context` in the state so it lands at the tail of the window.
     prompt="Responda as perguntas com bom humor e de forma amigável.",
+    state_schema=ExampleAgentState,
     pre_model_hook=manage_agent_message_history,
 )
@@ -26,8 +26,12 @@ def get_agent(agent_id: str) -> AgentGraph:
     return agents[agent_id].graph
 
 
+# The registry is constant after import, so build the info list once.
+ALL_AGENT_INFO: list[AgentInfo] = [
+    AgentInfo(key=agent_id, description=agent.description)
+    for agent_id, agent in agents.items()
+]
+
+
 def get_all_agent_info() -> list[AgentInfo]:
-    return [
-        AgentInfo(key=agent_id, description=agent.description)
-        for agent_id, agent in agents.items()
-    ]
+    return ALL_AGENT_INFO
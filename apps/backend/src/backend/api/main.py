@@ -1,13 +1,18 @@
+import asyncio
 import logging
 import sqlite3
+import time
 import warnings
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 from typing import Annotated, Any
 from uuid import uuid4
 
+import orjson
 import psycopg
-from fastapi import APIRouter, Depends, FastAPI, HTTPException, status
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request, status
+from fastapi.responses import HTMLResponse, ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from langchain_core._api import LangChainBetaWarning
 from langchain_core.messages import HumanMessage
@@ -33,21 +38,44 @@ from backend.memory.postgres import get_postgres_connection_string
 warnings.filterwarnings("ignore", category=LangChainBetaWarning)
 logger = logging.getLogger(__name__)
 
+# Per-thread "has a pending interrupt" flags. In the common no-interrupt case
+# this lets _handle_input skip the aget_state checkpointer read that would
+# otherwise precede every invocation. Entries are refreshed after each invoke;
+# the TTL bounds staleness if a thread is touched by another process.
+_interrupt_flags: TTLCache[str, bool] = TTLCache(maxsize=10_000, ttl=3600)
+
+# One CallbackHandler per process: instantiation reads settings and sets up
+# internal state, and the handler is stateless across runs (per-trace context
+# comes from the run's config), so there is no need to rebuild it per request.
+_LANGFUSE_HANDLER = CallbackHandler() if settings.LANGFUSE_TRACING else None
+
+# Health probes fire every few seconds; cache the (timestamp, ok) result of
+# the synchronous Langfuse auth_check so we don't hit its API on each probe.
+_LANGFUSE_CLIENT = Langfuse() if settings.LANGFUSE_TRACING else None
+_LANGFUSE_AUTH_TTL = 30.0
+_langfuse_auth_cache: tuple[float, bool] | None = None
+
+# Shared fallbacks for building AgentOutput: Pydantic copies collection
+# inputs during validation, so these are never mutated and can be reused
+# instead of allocating fresh empties on every response.
+_EMPTY_LIST: list = []
+_EMPTY_DICT: dict = {}
+
+
+# Both the security scheme and the unwrapped secret are constant for the
+# process lifetime; build them once instead of per request.
+_BEARER = HTTPBearer(description="Please provide AUTH_SECRET api key.", auto_error=False)
+_AUTH_SECRET_VALUE = (
+    settings.AUTH_SECRET.get_secret_value() if settings.AUTH_SECRET else None
+)
+
 
 def verify_bearer(
-    http_auth: Annotated[
-        HTTPAuthorizationCredentials | None,
-        Depends(
-            HTTPBearer(
-                description="Please provide AUTH_SECRET api key.", auto_error=False
-            )
-        ),
-    ],
+    http_auth: Annotated[HTTPAuthorizationCredentials | None, Depends(_BEARER)],
 ) -> None:
-    if not settings.AUTH_SECRET:
+    if _AUTH_SECRET_VALUE is None:
         return
-    auth_secret = settings.AUTH_SECRET.get_secret_value()
-    if not http_auth or http_auth.credentials != auth_secret:
+    if not http_auth or http_auth.credentials != _AUTH_SECRET_VALUE:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
 
 
@@ -75,20 +103,47 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         raise
 
 
-app = FastAPI(lifespan=lifespan)
+# orjson serializes the large message lists in AgentOutput several times
+# faster than stdlib json, which matters most for /history transcripts.
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 router = APIRouter(dependencies=[Depends(verify_bearer)])
 
 
+if settings.is_dev():
+    from pyinstrument import Profiler
+
+    @app.middleware("http")
+    async def profile_request(request: Request, call_next):
+        """
+        Profile any request with pyinstrument by appending `?profile=1`.
+
+        Dev-only: lets us attribute latency between validation, LangGraph
+        node execution, callback overhead and checkpointer I/O without
+        redeploying. Only async routes are profiled correctly, which
+        matches our endpoints.
+        """
+        if not request.query_params.get("profile"):
+            return await call_next(request)
+        profiler = Profiler(interval=0.001, async_mode="enabled")
+        profiler.start()
+        await call_next(request)
+        profiler.stop()
+        return HTMLResponse(profiler.output_html())
+
+
+# The agent registry and model list are constant after startup, so build the
+# response model once instead of sorting and validating on every request.
+_SERVICE_METADATA = ServiceMetadata(
+    agents=get_all_agent_info(),
+    models=sorted(settings.AVAILABLE_MODELS),
+    default_agent=DEFAULT_AGENT,
+    default_model=settings.DEFAULT_MODEL,  # pyright: ignore[reportArgumentType]
+)
+
+
 @router.get("/info")
 async def info() -> ServiceMetadata:
-    models = list(settings.AVAILABLE_MODELS)
-    models.sort()
-    return ServiceMetadata(
-        agents=get_all_agent_info(),
-        models=models,
-        default_agent=DEFAULT_AGENT,
-        default_model=settings.DEFAULT_MODEL,  # pyright: ignore[reportArgumentType]
-    )
+    return _SERVICE_METADATA
 
 
 async def _handle_input(user_input: UserInput, agent: AgentGraph) -> dict[str, Any]:
@@ -105,10 +160,7 @@ async def _handle_input(user_input: UserInput, agent: AgentGraph) -> dict[str, A
         "user_id": user_id,
     }
 
-    callbacks = []
-    if settings.LANGFUSE_TRACING:
-        langfuse_handler = CallbackHandler()
-        callbacks.append(langfuse_handler)
+    callbacks = [_LANGFUSE_HANDLER] if _LANGFUSE_HANDLER else []
 
     if user_input.agent_config:
         if overlap := configurable.keys() & user_input.agent_config.keys():
@@ -123,14 +175,21 @@ async def _handle_input(user_input: UserInput, agent: AgentGraph) -> dict[str, A
         callbacks=callbacks,  # type: ignore
     )
 
-    # Check for interrupts that need to be resumed
-    state = await agent.aget_state(config=config)
-    interrupted_tasks = [
-        task for task in state.tasks if hasattr(task, "interrupts") and task.interrupts
-    ]
+    # Check for interrupts that need to be resumed. Only hit the checkpointer
+    # on a cache miss or when the last invocation left an interrupt pending.
+    has_interrupt = _interrupt_flags.get(thread_id)
+    if has_interrupt is None or has_interrupt:
+        state = await agent.aget_state(config=config)
+        interrupted_tasks = [
+            task
+            for task in state.tasks
+            if hasattr(task, "interrupts") and task.interrupts
+        ]
+        has_interrupt = bool(interrupted_tasks)
+        _interrupt_flags[thread_id] = has_interrupt
 
     input: Command | dict[str, Any]
-    if interrupted_tasks:
+    if has_interrupt:
         # assume user input is response to resume agent execution from interrupt
         input = Command(resume=user_input.message)
     else:
@@ -144,6 +203,12 @@ async def _handle_input(user_input: UserInput, agent: AgentGraph) -> dict[str, A
     return kwargs
 
 
+def _record_interrupt_state(config: RunnableConfig, output: dict[str, Any]) -> None:
+    """Refresh the cached interrupt flag for a thread after an invocation."""
+    thread_id = config["configurable"]["thread_id"]  # type: ignore[index]
+    _interrupt_flags[thread_id] = "__interrupt__" in output
+
+
 @router.post("/{agent_id}/invoke")
 @router.post("/invoke")
 async def invoke(user_input: UserInput, agent_id: str = DEFAULT_AGENT) -> AgentOutput:
@@ -152,9 +217,10 @@ async def invoke(user_input: UserInput, agent_id: str = DEFAULT_AGENT) -> AgentO
 
     try:
         output = await agent.ainvoke(**kwargs)
+        _record_interrupt_state(kwargs["config"], output)
         output = AgentOutput(
-            messages=output.get("messages", []),
-            custom_data=output.get("custom_data", {}),
+            messages=output.get("messages") or _EMPTY_LIST,
+            custom_data=output.get("custom_data") or _EMPTY_DICT,
         )
         return output
     except Exception as e:
@@ -162,6 +228,78 @@ async def invoke(user_input: UserInput, agent_id: str = DEFAULT_AGENT) -> AgentO
         raise HTTPException(status_code=500, detail="Unexpected error") from e
 
 
+@router.post("/{agent_id}/stream")
+@router.post("/stream")
+async def stream(
+    user_input: UserInput, agent_id: str = DEFAULT_AGENT
+) -> StreamingResponse:
+    """
+    Stream agent execution events for a user message as Server-Sent Events.
+
+    Uses `astream_events` (v2) so clients see tokens and tool activity as
+    they happen instead of waiting for the full /invoke response.
+    """
+    agent: AgentGraph = get_agent(agent_id)
+    kwargs = await _handle_input(user_input, agent)
+
+    async def event_gen() -> AsyncGenerator[str, None]:
+        # Run the agent inside the generator so the tracing context opens
+        # and closes around the actual iteration; opening it in the route
+        # would let Langfuse close the trace before streaming starts.
+        try:
+            async for event in agent.astream_events(**kwargs, version="v2"):
+                yield f"data: {orjson.dumps(event, default=str).decode()}\n\n"
+        except Exception as e:
+            logger.error(f"An exception occurred: {e}")
+            yield 'data: {"event": "error"}\n\n'
+        finally:
+            # Unlike /invoke and /batch there is no final output dict to
+            # inspect for __interrupt__, so drop the cached flag and let the
+            # next request fall back to aget_state.
+            thread_id = kwargs["config"]["configurable"]["thread_id"]
+            _interrupt_flags.pop(thread_id, None)
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(event_gen(), media_type="text/event-stream")
+
+
+@router.post("/{agent_id}/batch")
+@router.post("/batch")
+async def batch(
+    user_inputs: list[UserInput], agent_id: str = DEFAULT_AGENT
+) -> list[AgentOutput]:
+    """
+    Invoke the agent for several independent inputs in one request.
+
+    Uses LangGraph's native `abatch` so the threads execute concurrently
+    under a single handler, instead of N HTTP calls each paying its own
+    validation and state round-trip. Intended for evaluation runs and
+    high-throughput clients.
+    """
+    agent: AgentGraph = get_agent(agent_id)
+    kwargs_list = [
+        await _handle_input(user_input, agent) for user_input in user_inputs
+    ]
+
+    try:
+        outputs = await agent.abatch(
+            inputs=[kwargs["input"] for kwargs in kwargs_list],
+            config=[kwargs["config"] for kwargs in kwargs_list],
+        )
+        for kwargs, output in zip(kwargs_list, outputs):
+            _record_interrupt_state(kwargs["config"], output)
+        return [
+            AgentOutput(
+                messages=output.get("messages") or _EMPTY_LIST,
+                custom_data=output.get("custom_data") or _EMPTY_DICT,
+            )
+            for output in outputs
+        ]
+    except Exception as e:
+        logger.error(f"An exception occurred: {e}")
+        raise HTTPException(status_code=500, detail="Unexpected error") from e
+
+
 @router.post("/history")
 async def history(input: ChatHistoryInput) -> AgentOutput:
     """
@@ -174,12 +312,12 @@ async def history(input: ChatHistoryInput) -> AgentOutput:
             config=RunnableConfig(configurable={"thread_id": input.thread_id})
         )
         return AgentOutput(
-            messages=state_snapshot.values.get("messages", []),
-            custom_data=state_snapshot.values.get("custom_data", {}),
+            messages=state_snapshot.values.get("messages") or _EMPTY_LIST,
+            custom_data=state_snapshot.values.get("custom_data") or _EMPTY_DICT,
         )
     except Exception as e:
         logger.error(f"An exception occurred: {e}")
-        raise HTTPException(status_code=500, detail="Unexpected error")
+        raise HTTPException(status_code=500, detail="Unexpected error") from e
 
 
 @router.post("/threads")
@@ -227,17 +365,26 @@ def list_threads(input: ThreadListInput) -> ThreadListOutput:
 async def health_check():
     """Health check endpoint."""
 
+    global _langfuse_auth_cache
+
     health_status = {"status": "ok"}
 
-    if settings.LANGFUSE_TRACING:
-        try:
-            langfuse = Langfuse()
-            health_status["langfuse"] = (
-                "connected" if langfuse.auth_check() else "disconnected"
-            )
-        except Exception as e:
-            logger.error(f"Langfuse connection error: {e}")
-            health_status["langfuse"] = "disconnected"
+    if _LANGFUSE_CLIENT:
+        now = time.monotonic()
+        if (
+            _langfuse_auth_cache is None
+            or now - _langfuse_auth_cache[0] >= _LANGFUSE_AUTH_TTL
+        ):
+            try:
+                # auth_check is sync HTTP; run it off the event loop.
+                connected = await asyncio.to_thread(_LANGFUSE_CLIENT.auth_check)
+            except Exception as e:
+                logger.error(f"Langfuse connection error: {e}")
+                connected = False
+            _langfuse_auth_cache = (now, connected)
+        health_status["langfuse"] = (
+            "connected" if _langfuse_auth_cache[1] else "disconnected"
+        )
 
     return health_status
 
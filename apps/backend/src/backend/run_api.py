@@ -1,3 +1,5 @@
+import sys
+
 import uvicorn
 from dotenv import load_dotenv
 from shared.core import settings
@@ -11,6 +13,12 @@ def main() -> None:
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.is_dev(),
+        # uvloop and httptools measurably cut latency for the I/O-bound
+        # /invoke flow (checkpointer read, LLM call, checkpointer write).
+        # uvloop is not supported on Windows, so fall back to asyncio there.
+        loop="uvloop" if sys.platform != "win32" else "auto",
+        http="httptools",
+        workers=settings.WORKERS,
     )
 
 
@@ -1,10 +1,12 @@
 def main():
-    import subprocess
+    import os
     from pathlib import Path
 
     script_dir = Path(__file__).parent
     app_file = script_dir.parent.parent / "src/frontend/streamlit_app.py"
-    subprocess.run(["uv", "run", "--frozen", "streamlit", "run", str(app_file)])
+    # Replace this process instead of spawning a child: one fewer fork+exec,
+    # and Ctrl-C goes straight to streamlit rather than through a wrapper.
+    os.execvp("uv", ["uv", "run", "--frozen", "streamlit", "run", str(app_file)])
 
 
 if __name__ == "__main__":
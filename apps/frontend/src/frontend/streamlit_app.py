@@ -11,12 +11,20 @@ from langchain_core.messages import AIMessage, AnyMessage, BaseMessage, HumanMes
 
 from frontend.client import AgentClient, AgentClientError
 
+# Streamlit re-executes this script on every rerun, so guard the .env disk
+# read with a process-level flag instead of re-parsing (or deferring it into
+# the async path, which would delay first render).
+if not os.environ.get("_ENV_LOADED"):
+    load_dotenv()
+    os.environ["_ENV_LOADED"] = "1"
+
 # A Streamlit app for interacting with the langgraph agent via a simple chat interface.
 # The app has three main functions which are all run async:
 
 # - main() - sets up the streamlit app and high level structure
-# - draw_messages() - draws a set of chat messages - either replaying existing messages
-#   or streaming new ones.
+# - draw_messages_sync() - replays already-materialized chat history.
+# - draw_messages() - draws a set of chat messages streamed from an async
+#   generator.
 
 # The app heavily uses AgentClient to interact with the agent's FastAPI endpoints.
 
@@ -27,25 +35,23 @@ USER_ID_COOKIE = "user_id"
 
 def get_or_create_user_id() -> str:
     """Get the user ID from session state or URL parameters, or create a new one if it doesn't exist."""
-    # Check if user_id exists in session state
-    if USER_ID_COOKIE in st.session_state:
+    # Hot path: this runs on every rerun, so the common case should be a
+    # single session-state lookup.
+    try:
         return st.session_state[USER_ID_COOKIE]
+    except KeyError:
+        pass
 
     # Try to get from URL parameters using the new st.query_params
-    if USER_ID_COOKIE in st.query_params:
-        user_id = st.query_params[USER_ID_COOKIE]
-        st.session_state[USER_ID_COOKIE] = user_id
-        return user_id
-
-    # Generate a new user_id if not found
-    user_id = str(uuid.uuid4())
+    user_id = st.query_params.get(USER_ID_COOKIE)
+    if user_id is None:
+        user_id = str(uuid.uuid4())
+        # Only write query params for brand-new users: setting them triggers
+        # extra URL-sync work in Streamlit.
+        st.query_params[USER_ID_COOKIE] = user_id
 
     # Store in session state for this session
     st.session_state[USER_ID_COOKIE] = user_id
-
-    # Also add to URL parameters so it can be bookmarked/shared
-    st.query_params[USER_ID_COOKIE] = user_id
-
     return user_id
 
 
@@ -68,16 +74,10 @@ async def main() -> None:
         </style>
         """,
     )
-    if st.get_option("client.toolbarMode") != "minimal":
-        st.set_option("client.toolbarMode", "minimal")
-        await asyncio.sleep(0.1)
-        st.rerun()
-
     # Get or create user ID
     user_id = get_or_create_user_id()
 
     if "agent_client" not in st.session_state:
-        load_dotenv()
         agent_url = os.getenv("AGENT_URL")
         if not agent_url:
             host = os.getenv("HOST", "0.0.0.0")
@@ -106,22 +106,28 @@ async def main() -> None:
                 st.error("No message history found for this Thread ID.")
                 messages = []
         st.session_state.messages = messages
+        # Track seen message IDs incrementally so each turn doesn't re-walk
+        # the full history to deduplicate.
+        st.session_state.existing_ids = {m.id for m in messages}
         st.session_state.thread_id = thread_id
 
     # Config options
     with st.sidebar:
         if st.button(":material/chat: New Chat", use_container_width=True):
             st.session_state.messages = []
+            st.session_state.existing_ids = set()
+            st.session_state.pop("_rendered_md", None)
             st.session_state.thread_id = str(uuid.uuid4())
             st.rerun()
 
         with st.popover(":material/settings: Settings", use_container_width=True):
-            model_idx = agent_client.info.models.index(agent_client.info.default_model)
-            model = st.selectbox(
-                "LLM to use", options=agent_client.info.models, index=model_idx
-            )
-            agent_list = [a.key for a in agent_client.info.agents]
-            agent_idx = agent_list.index(agent_client.info.default_agent)
+            # Bind once: keeps the sidebar independent of whether .info ever
+            # becomes a property that refetches from the service.
+            info = agent_client.info
+            model_idx = info.models.index(info.default_model)
+            model = st.selectbox("LLM to use", options=info.models, index=model_idx)
+            agent_list = [a.key for a in info.agents]
+            agent_idx = agent_list.index(info.default_agent)
             agent_client.agent = st.selectbox(
                 "Agent to use",
                 options=agent_list,
@@ -167,12 +173,9 @@ async def main() -> None:
         with st.chat_message("ai"):
             st.text(WELCOME)
 
-    # draw_messages() expects an async iterator over messages
-    async def amessage_iter() -> AsyncGenerator[AnyMessage, None]:
-        for m in messages:
-            yield m
-
-    await draw_messages(amessage_iter())
+    # Replay already-materialized history via the sync fast path; the async
+    # driver is only needed when streaming new messages.
+    draw_messages_sync(messages)
 
     # Generate new message if the user provided new input
     if user_input := st.chat_input():
@@ -185,13 +188,12 @@ async def main() -> None:
                 user_id=user_id,
             )
 
-            # Get existing message IDs to avoid duplicates
-            existing_ids = {msg.id for msg in messages}
-
             # Add only new messages that don't already exist
+            existing_ids = st.session_state.existing_ids
             for msg in output.messages:
                 if msg.id not in existing_ids:
                     messages.append(msg)
+                    existing_ids.add(msg.id)
 
             st.rerun()  # Rerun to update the chat with new messages
         except AgentClientError as e:
@@ -199,13 +201,186 @@ async def main() -> None:
             st.stop()
 
 
+def _markdown_content(msg: AIMessage) -> str:
+    """
+    Memoized Markdown newline fix for AI message content.
+
+    st.write renders markdown, so plain newlines need the trailing
+    double-space fix. Doing the replace on every rerun re-scans all AI
+    content; cache the result per message ID so replays are dict lookups.
+    The cache is session-scoped and cleared on New Chat.
+    """
+    rendered = st.session_state.setdefault("_rendered_md", {})
+    text = rendered.get(msg.id)
+    if text is None:
+        text = msg.content.replace("\n", "  \n")
+        if msg.id is not None:
+            rendered[msg.id] = text
+    return text
+
+
+def _record_new_message(msg: AnyMessage) -> None:
+    """Store a newly streamed message and keep the dedup ID set in sync."""
+    st.session_state.messages.append(msg)
+    st.session_state.existing_ids.add(msg.id)
+
+
+def _halt_unexpected(msg) -> None:
+    """Log an unexpected message and stop the script run."""
+    label = msg.type if isinstance(msg, BaseMessage) else type(msg)
+    st.error(f"Unexpected message type: {label}")
+    st.text(msg)
+    st.stop()
+
+
+def _draw_human(msg: HumanMessage) -> None:
+    # weird bug with newline characters in streamlit
+    st.chat_message("human").text(msg.content)
+
+
+def _draw_ai_message(msg: AIMessage, is_new: bool) -> dict:
+    """
+    Render an AI message's content and open a status container per tool call.
+
+    Returns the status containers keyed by tool call ID. Filling in the tool
+    results is left to the drivers, since that requires pulling further
+    messages from their (sync or async) iterator.
+    """
+    # If the last message type was not AI, main()/the drivers have already
+    # created a fresh chat message container in session state.
+    with st.session_state.last_message:
+        if msg.content:
+            st.write(_markdown_content(msg))
+
+        call_results = {}
+        if hasattr(msg, "tool_calls") and msg.tool_calls:
+            # Create a status container for each tool call and store the
+            # status container by ID to ensure results are mapped to the
+            # correct status container.
+            for tool_call in msg.tool_calls:
+                status = st.status(
+                    f"""Tool Call: {tool_call["name"]}""",
+                    state="running" if is_new else "complete",
+                )
+                call_results[tool_call["id"]] = status
+                status.write("Input:")
+                status.write(tool_call["args"])
+    return call_results
+
+
+def _draw_tool_result(tool_result: AnyMessage, call_results: dict, status):
+    """
+    Render one tool result into its status container.
+
+    Returns the container written to, so drivers can fall back to it when a
+    later result arrives without a tool_call_id.
+    """
+    if tool_result.type != "tool":
+        _halt_unexpected(tool_result)
+    if tool_result.tool_call_id:
+        status = call_results[tool_result.tool_call_id]
+    status.write("Output:")
+    status.text(tool_result.content)
+    status.update(state="complete")
+    return status
+
+
+def _handoff_done(msg, status) -> bool:
+    """Check a handed-off agent's message for completion; close its status."""
+    # Break out of the status container if finish_reason is anything other
+    # than "tool_calls"
+    finish_reason = getattr(msg, "response_metadata", {}).get("finish_reason")
+    if finish_reason is not None and finish_reason != "tool_calls":
+        if status:
+            status.update(state="complete")
+        return True
+    return False
+
+
+def _draw_handoff_sub_msg(sub_msg, status, nested_popovers: dict) -> None:
+    """Render one message inside a transfer_to tool call's status container."""
+    if sub_msg.type == "tool" and sub_msg.tool_call_id in nested_popovers:
+        popover = nested_popovers[sub_msg.tool_call_id]
+        popover.write("**Output:**")
+        popover.text(sub_msg.content)
+        return
+    # Display content and tool calls using the same status
+    if status:
+        if sub_msg.content:
+            status.text(sub_msg.content)
+        if hasattr(sub_msg, "tool_calls") and sub_msg.tool_calls:
+            for tc in sub_msg.tool_calls:
+                popover = status.popover(f"{tc['name']}", icon="🛠️")
+                popover.write(f"**Tool:** {tc['name']}")
+                popover.write("**Input:**")
+                popover.write(tc["args"])
+                # Store the popover reference using the tool call ID
+                nested_popovers[tc["id"]] = popover
+
+
+def draw_messages_sync(messages: list[AnyMessage]) -> None:
+    """
+    Draw an already-materialized list of chat messages.
+
+    Replay driver for the is_new=False case: same rendering helpers as
+    draw_messages(), but iterating the list directly. Streamlit reruns the
+    whole script on every widget tick, and pulling a long history through an
+    async generator allocates a coroutine frame per `anext` — pure overhead
+    when nothing is streaming.
+    """
+    message_iter = iter(messages)
+    last_message_type = None
+    st.session_state.last_message = None
+
+    while msg := next(message_iter, None):
+        if not isinstance(msg, BaseMessage):
+            _halt_unexpected(msg)
+
+        if isinstance(msg, HumanMessage):
+            last_message_type = "human"
+            _draw_human(msg)
+
+        elif isinstance(msg, AIMessage):
+            if last_message_type != "ai":
+                last_message_type = "ai"
+                st.session_state.last_message = st.chat_message("ai")
+
+            call_results = _draw_ai_message(msg, is_new=False)
+            status = list(call_results.values())[-1] if call_results else None
+
+            # Expect one ToolMessage for each tool call.
+            for tool_call in getattr(msg, "tool_calls", None) or []:
+                if "transfer_to" in tool_call["name"]:
+                    handle_agent_msgs_sync(message_iter, call_results)
+                    break
+                tool_result: AnyMessage = next(message_iter)
+                status = _draw_tool_result(tool_result, call_results, status)
+
+        else:
+            _halt_unexpected(msg)
+
+
+def handle_agent_msgs_sync(message_iter, call_results):
+    """Sync replay counterpart of handle_agent_msgs()."""
+    nested_popovers = {}
+    # looking for the Success tool call message
+    first_msg = next(message_iter)
+    status = call_results.get(getattr(first_msg, "tool_call_id", None))
+    if status and first_msg.content:
+        status.text(first_msg.content)
+    # Continue reading until finish_reason='stop'
+    while not _handoff_done(first_msg, status):
+        sub_msg = next(message_iter)
+        _draw_handoff_sub_msg(sub_msg, status, nested_popovers)
+        first_msg = sub_msg
+
+
 async def draw_messages(
     messages_agen: AsyncGenerator[AnyMessage | str, None],
     is_new: bool = False,
 ) -> None:
     """
-    Draws a set of chat messages - either replaying existing messages
-    or streaming new ones.
+    Draws a set of chat messages streamed from an async generator.
 
     This function has additional logic to handle streaming tokens and tool calls.
     - Use a placeholder container to render streaming tokens as they arrive.
@@ -216,6 +391,10 @@ async def draw_messages(
     since later messages can draw to the same container. This is also used for
     drawing the feedback widget in the latest chat message.
 
+    The per-message rendering lives in the _draw_* helpers shared with
+    draw_messages_sync(); this driver only owns fetching messages and
+    recording new ones in session state.
+
     Args:
         messages_aiter: An async iterator over messages to draw.
         is_new: Whether the messages are new or not.
@@ -228,76 +407,42 @@ async def draw_messages(
     # Iterate over the messages and draw them
     while msg := await anext(messages_agen, None):
         if not isinstance(msg, BaseMessage):
-            st.error(f"Unexpected message type: {type(msg)}")
-            st.text(msg)
-            st.stop()
+            _halt_unexpected(msg)
 
         # A message from the user, the easiest case
         if isinstance(msg, HumanMessage):
             last_message_type = "human"
-            # weird bug with newline characters in streamlit
-            st.chat_message("human").text(msg.content)
+            _draw_human(msg)
 
         # A message from the agent is the most complex case, since we need to
         # handle streaming tokens and tool calls.
         elif isinstance(msg, AIMessage):
             # If we're rendering new messages, store the message in session state
             if is_new:
-                st.session_state.messages.append(msg)
+                _record_new_message(msg)
 
             # If the last message type was not AI, create a new chat message
             if last_message_type != "ai":
                 last_message_type = "ai"
                 st.session_state.last_message = st.chat_message("ai")
 
-            with st.session_state.last_message:
-                # If the message has content, write it out.
-                # Reset the streaming variables to prepare for the next message.
-                if msg.content:
-                    # when using write streamlit uses markdown, so we need to fix the newlines
-                    st.write(msg.content.replace("\n", "  \n"))
-
-                if hasattr(msg, "tool_calls") and msg.tool_calls:
-                    # Create a status container for each tool call and store the
-                    # status container by ID to ensure results are mapped to the
-                    # correct status container.
-                    call_results = {}
-                    for tool_call in msg.tool_calls:
-                        status = st.status(
-                            f"""Tool Call: {tool_call["name"]}""",
-                            state="running" if is_new else "complete",
-                        )
-                        call_results[tool_call["id"]] = status
-                        status.write("Input:")
-                        status.write(tool_call["args"])
-
-                    # Expect one ToolMessage for each tool call.
-                    for tool_call in msg.tool_calls:
-                        if "transfer_to" in tool_call["name"]:
-                            await handle_agent_msgs(messages_agen, call_results, is_new)
-                            break
-                        tool_result: AnyMessage = await anext(messages_agen)
-
-                        if tool_result.type != "tool":
-                            st.error(f"Unexpected AnyMessage type: {tool_result.type}")
-                            st.text(tool_result)
-                            st.stop()
-
-                        # Record the message if it's new, and update the correct
-                        # status container with the result
-                        if is_new:
-                            st.session_state.messages.append(tool_result)
-                        if tool_result.tool_call_id:
-                            status = call_results[tool_result.tool_call_id]
-                        status.write("Output:")
-                        status.text(tool_result.content)
-                        status.update(state="complete")
+            call_results = _draw_ai_message(msg, is_new)
+            status = list(call_results.values())[-1] if call_results else None
+
+            # Expect one ToolMessage for each tool call.
+            for tool_call in getattr(msg, "tool_calls", None) or []:
+                if "transfer_to" in tool_call["name"]:
+                    await handle_agent_msgs(messages_agen, call_results, is_new)
+                    break
+                tool_result: AnyMessage = await anext(messages_agen)
+                status = _draw_tool_result(tool_result, call_results, status)
+                # Record the message if it's new
+                if is_new:
+                    _record_new_message(tool_result)
 
         # In case of an unexpected message type, log an error and stop
         else:
-            st.error(f"Unexpected AnyMessage type: {msg.type}")
-            st.text(msg)
-            st.stop()
+            _halt_unexpected(msg)
 
 
 async def handle_agent_msgs(messages_agen, call_results, is_new):
@@ -310,47 +455,16 @@ async def handle_agent_msgs(messages_agen, call_results, is_new):
     # looking for the Success tool call message
     first_msg = await anext(messages_agen)
     if is_new:
-        st.session_state.messages.append(first_msg)
+        _record_new_message(first_msg)
     status = call_results.get(getattr(first_msg, "tool_call_id", None))
-    # Process first message
     if status and first_msg.content:
         status.text(first_msg.content)
-        # Continue reading until finish_reason='stop'
-    while True:
-        # Check for completion on current message
-        finish_reason = getattr(first_msg, "response_metadata", {}).get("finish_reason")
-        # Break out of status container if finish_reason is anything other than "tool_calls"
-        if finish_reason is not None and finish_reason != "tool_calls":
-            if status:
-                status.update(state="complete")
-            break
-        # Read next message
+    # Continue reading until finish_reason='stop'
+    while not _handoff_done(first_msg, status):
         sub_msg = await anext(messages_agen)
-        # this should only happen is skip_stream flag is removed
-        # if isinstance(sub_msg, str):
-        #     continue
         if is_new:
-            st.session_state.messages.append(sub_msg)
-
-        if sub_msg.type == "tool" and sub_msg.tool_call_id in nested_popovers:
-            popover = nested_popovers[sub_msg.tool_call_id]
-            popover.write("**Output:**")
-            popover.text(sub_msg.content)
-            first_msg = sub_msg
-            continue
-        # Display content and tool calls using the same status
-        if status:
-            if sub_msg.content:
-                status.text(sub_msg.content)
-            if hasattr(sub_msg, "tool_calls") and sub_msg.tool_calls:
-                for tc in sub_msg.tool_calls:
-                    popover = status.popover(f"{tc['name']}", icon="🛠️")
-                    popover.write(f"**Tool:** {tc['name']}")
-                    popover.write("**Input:**")
-                    popover.write(tc["args"])
-                    # Store the popover reference using the tool call ID
-                    nested_popovers[tc["id"]] = popover
-        # Update first_msg for next iteration
+            _record_new_message(sub_msg)
+        _draw_handoff_sub_msg(sub_msg, status, nested_popovers)
         first_msg = sub_msg
 
 
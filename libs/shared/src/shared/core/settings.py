@@ -53,6 +53,7 @@ class Settings(BaseSettings):
 
     HOST: str = "0.0.0.0"
     PORT: int = 8080
+    WORKERS: int = 1
 
     AUTH_SECRET: SecretStr | None = None
 